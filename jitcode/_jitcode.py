@@ -3,20 +3,27 @@
 
 from warnings import warn
 from types import FunctionType, BuiltinFunctionType
-from inspect import signature
+from importlib.util import module_from_spec, spec_from_file_location
 from itertools import count
+from hashlib import sha256
+from os import environ, makedirs, path
+import shutil
 
 from numpy import hstack, log
 import numpy as np
+from scipy.linalg import qr
 import symengine
+from symengine.printing import ccode
 
 from jitcxde_common import jitcxde, checker
+from jitcxde_common.code import write_in_chunks
+from jitcxde_common.modules import add_suffix, get_module_path, module_from_path
 from jitcxde_common.helpers import sympify_helpers, sort_helpers, find_dependent_helpers
-from jitcxde_common.numerical import random_direction, orthonormalise_qr
+from jitcxde_common.numerical import random_direction
 from jitcxde_common.symbolic import collect_arguments, ordered_subs, replace_function
 from jitcxde_common.transversal import GroupHandler
 
-from jitcode.integrator_tools import empty_integrator, IVP_wrapper, IVP_wrapper_no_interpolation, ODE_wrapper, integrator_info, UnsuccessfulIntegration
+from jitcode.integrator_tools import empty_integrator, IVP_wrapper, IVP_wrapper_no_interpolation, ODE_wrapper, RK4_wrapper, integrator_info, UnsuccessfulIntegration
 
 #: the symbol for the state that must be used to define the differential equation. It is a function and the integer argument denotes the component. You may just as well define an analogous function directly with SymEngine or SymPy, but using this function is the best way to get the most of future versions of JiTCODE, in particular avoiding incompatibilities. You can import a SymPy variant from the submodule `sympy_symbols` instead (see `SymPy vs. SymEngine`_ for details).
 y = symengine.Function("y")
@@ -24,30 +31,108 @@ y = symengine.Function("y")
 #: the symbol for time for defining the differential equation. If your differential equation has no explicit time dependency (“autonomous system”), you do not need this. You may just as well define an analogous symbol directly with SymEngine or SymPy, but using this function is the best way to get the most of future versions of JiTCODE, in particular avoiding incompatibilities. You can import a SymPy variant from the submodule `sympy_symbols` instead (see `SymPy vs. SymEngine`_ for details).
 t = symengine.Symbol("t", real=True)
 
+def _default_module_cache_dir():
+	base = environ.get( "XDG_CACHE_HOME", path.join(path.expanduser("~"),".cache") )
+	return path.join(base,"jitcode")
+
 def _is_C(function):
 	return isinstance(function, BuiltinFunctionType)
 
 def _is_lambda(function):
 	return isinstance(function, FunctionType)
 
-def _jac_from_f_with_helpers(f, helpers, simplify, n):
-	dependent_helpers = [
-			find_dependent_helpers(helpers,y(i))
+def _ccode(expression):
+	try:
+		return ccode(expression)
+	except RuntimeError as error:
+		if "Not supported" not in str(error):
+			raise
+		raise NotImplementedError(
+				f"Cannot convert the following expression to C Code:\n{expression}"
+			) from error
+
+def _resolve_simplify(simplify,n):
+	if simplify is None:
+		return "light" if n<=10 else False
+	else:
+		return simplify
+
+def _simplify_entry(entry,simplify):
+	if simplify=="light":
+		return entry.expand()
+	elif simplify:
+		return entry.simplify(ratio=1.0)
+	else:
+		return entry
+
+def _dependent_helpers_by_index(helpers, n):
+	"""
+	computes `find_dependent_helpers` for every dynamical variable, only calling it for variables that actually occur in some helper expression – all others get an empty list of dependent helpers.
+	"""
+	if not helpers:
+		return [ [] for i in range(n) ]
+	
+	present = set()
+	for helper in helpers:
+		present.update( int(argument[0]) for argument in collect_arguments(helper[1],y) )
+	
+	return [
+			find_dependent_helpers(helpers,y(i)) if i in present else []
 			for i in range(n)
 		]
+
+def _jac_from_f_with_helpers(f, helpers, simplify, n):
+	dependent_helpers = _dependent_helpers_by_index(helpers,n)
 	
 	def line(f_entry):
+		present = { int(argument[0]) for argument in collect_arguments(f_entry,y) }
+		helper_derivatives = {}
 		for j in range(n):
-			entry = f_entry.diff(y(j))
+			entry = f_entry.diff(y(j)) if j in present else symengine.Integer(0)
 			for helper in dependent_helpers[j]:
-				entry += f_entry.diff(helper[0]) * helper[1]
+				if helper[0] not in helper_derivatives:
+					helper_derivatives[helper[0]] = f_entry.diff(helper[0])
+				derivative = helper_derivatives[helper[0]]
+				if derivative != 0:
+					entry += derivative * helper[1]
 			if simplify:
-				entry = entry.simplify(ratio=1.0)
+				entry = _simplify_entry(entry,simplify)
 			yield entry
 	
 	for f_entry in f():
 		yield line(f_entry)
 
+def _init_jac_pool(dependent_helpers, simplify):
+	# Called once per worker process to avoid pickling the helpers for every row.
+	global _jac_pool_args
+	_jac_pool_args = (dependent_helpers, simplify)
+
+def _jac_row(f_entry):
+	dependent_helpers, simplify = _jac_pool_args
+	present = { int(argument[0]) for argument in collect_arguments(f_entry,y) }
+	helper_derivatives = {}
+	row = []
+	for j,dependencies in enumerate(dependent_helpers):
+		entry = f_entry.diff(y(j)) if j in present else symengine.Integer(0)
+		for helper in dependencies:
+			if helper[0] not in helper_derivatives:
+				helper_derivatives[helper[0]] = f_entry.diff(helper[0])
+			derivative = helper_derivatives[helper[0]]
+			if derivative != 0:
+				entry += derivative * helper[1]
+		if simplify:
+			entry = _simplify_entry(entry,simplify)
+		row.append(entry)
+	return row
+
+def _jac_from_f_with_helpers_parallel(f, helpers, simplify, n, processes):
+	from multiprocessing import Pool
+	
+	dependent_helpers = _dependent_helpers_by_index(helpers,n)
+	
+	with Pool( processes, _init_jac_pool, (dependent_helpers,simplify) ) as pool:
+		return pool.map( _jac_row, f() )
+
 class jitcode(jitcxde):
 	"""
 	Parameters
@@ -60,13 +145,16 @@ class jitcode(jitcxde):
 	
 	wants_jacobian : boolean
 		Tell JiTCODE to calculate and compile the Jacobian. For vanilla use, you do not need to bother about this as this is automatically set to `True` if the selected method of integration desires the Jacobian. However, it is sometimes useful if you want to manually apply some code-generation steps (e.g., to apply some tweaks).
-		
+	
 	n : integer
 		Length of `f_sym`. While JiTCODE can easily determine this itself (and will, if necessary), this may take some time if `f_sym` is a generator function and `n` is large. Take care that this value is correct – if it isn’t, you will not get a helpful error message.
 	
 	control_pars : iterable of symbols
 		Each symbol corresponds to a control parameter that can be used when defining the equations and set after compilation using `set_parameters` (in the same order as given here). Using this makes sense if you need to do a parameter scan with short integrations for each parameter and you spend a considerable amount of time compiling.
 	
+	freeze_params : dictionary mapping symbols to numbers
+		Control parameters that shall be pinned to fixed values before the code generation. The respective values are substituted into the derivative and the helpers, and the respective symbols are removed from `control_pars` (so `set_parameters` only expects values for the remaining parameters). As the compiler then sees plain constants instead of opaque arguments, it can apply optimisations like constant folding. Use this if you know the values at compile time and do not need to change them afterwards; see also `clone_with_params`.
+	
 	callback_functions : iterable
 		Python functions that should be called at integration time (callback) when evaluating the derivative. Each element of the iterable represents one callback function as a tuple containing (in that order):
 		
@@ -81,6 +169,9 @@ class jitcode(jitcxde):
 	
 	module_location : string
 		location of a module file from which functions are to be loaded (see `save_compiled`). If you use this, you need not give `f_sym` as an argument, but in this case you must give `n`. If you used `control_pars` or `callback_functions`, you have to provide them again. Depending on the arguments you provide, functionalities such as recompiling may not be available; but then the entire point of this option is to avoid these.
+	
+	cache_f_sym : boolean
+		Whether the derivative shall be materialised and stored when it is first needed (instead of calling `f_sym` anew for every processing step that requires it). You only want to disable this if your differential equation is so large that storing it becomes a memory problem – in which case you should provide a cheap generator function as `f_sym`.
 	"""
 	
 	dynvar = y
@@ -91,9 +182,11 @@ class jitcode(jitcxde):
 				wants_jacobian = False,
 				n = None,
 				control_pars = (),
+				freeze_params = None,
 				callback_functions = (),
 				verbose = True,
 				module_location = None,
+				cache_f_sym = True,
 			):
 		jitcxde.__init__(self,n,verbose,module_location)
 		
@@ -101,8 +194,31 @@ class jitcode(jitcxde):
 		self._f_C_source = False
 		self._jac_C_source = False
 		self._helper_C_source = False
-		self.helpers = sort_helpers(sympify_helpers(helpers or []))
+		self.helpers = sort_helpers(sympify_helpers(helpers)) if helpers else []
 		self.control_pars = control_pars
+		
+		if freeze_params:
+			freeze_params = {
+					symengine.sympify(par): symengine.sympify(value)
+					for par,value in freeze_params.items()
+				}
+			inner_f_sym = self.f_sym
+			def frozen_f_sym():
+				for entry in inner_f_sym():
+					yield entry.xreplace(freeze_params)
+			self.f_sym = frozen_f_sym
+			self.helpers = [
+					( helper[0], helper[1].xreplace(freeze_params) )
+					for helper in self.helpers
+				]
+			self.control_pars = [
+					control_par
+					for control_par in self.control_pars
+					if control_par not in freeze_params
+				]
+		
+		if cache_f_sym:
+			self.f_sym = self._cache_f_sym(self.f_sym)
 		self.control_par_values = ()
 		self.callback_functions = callback_functions
 		self._wants_jacobian = wants_jacobian
@@ -125,7 +241,18 @@ class jitcode(jitcxde):
 		self.general_subs = {
 				control_par: symengine.Symbol("parameter_"+control_par.name)
 				for control_par in self.control_pars
-			}
+			} if self.control_pars else {}
+	
+	def _cache_f_sym(self,f_sym):
+		"""
+		wraps a generator function such that the first call materialises its output and subsequent calls iterate over the stored result. This avoids repeating potentially expensive symbolic work when the derivative is needed several times (e.g., for the code generation and the Jacobian).
+		"""
+		self._f_sym_cache = None
+		def cached_f_sym():
+			if self._f_sym_cache is None:
+				self._f_sym_cache = list(f_sym())
+			return iter(self._f_sym_cache)
+		return cached_f_sym
 	
 	@checker
 	def _check_non_empty(self):
@@ -162,24 +289,47 @@ class jitcode(jitcxde):
 			self.report("generated symbolic Jacobian")
 		return self._jac_sym
 	
-	def generate_jac_sym(self, simplify=True):
+	def generate_jac_sym(self, simplify=None, processes=1):
 		"""
 		generates the Jacobian using SymEngine’s differentiation.
 		
 		Parameters
 		----------
-		simplify : boolean
-			Whether the resulting Jacobian should be `simplified <http://docs.sympy.org/dev/modules/simplify/simplify.html>`_ (with `ratio=1.0`). This is almost always a good thing.
+		simplify : boolean, `"light"`, or `None`
+			How the resulting Jacobian should be simplified: If `True`, SymEngine’s full `simplify` (with `ratio=1.0`) is applied, which can take very long for large expressions. If `"light"`, the entries are merely expanded, which cheaply takes care of the products arising from the chain rule. If `False`, nothing happens. If `None`, this is automatically set to `"light"` for `n≤10` and `False` otherwise.
+		
+		processes : integer or `None`
+			Number of processes over which the rows of the Jacobian are distributed. If `1` (the default), everything happens in this very process and the Jacobian is generated lazily. If `None`, as many processes as there are CPUs are used. Using multiple processes only pays off if your differential equation is so large that differentiating (and simplifying) it takes considerably longer than spawning processes and communicating the results.
 		"""
-		self._jac_sym = _jac_from_f_with_helpers(self.f_sym, self.helpers, simplify, self.n)
+		simplify = _resolve_simplify(simplify,self.n)
+		if processes == 1:
+			self._jac_sym = _jac_from_f_with_helpers(self.f_sym, self.helpers, simplify, self.n)
+		else:
+			self._jac_sym = _jac_from_f_with_helpers_parallel(self.f_sym, self.helpers, simplify, self.n, processes)
 	
 	def _default_arguments(self):
 		basics = [
 				("t", "double const"),
-				("Y", "PyArrayObject *__restrict const")
+				("y_data", "double const *__restrict const"),
 			]
+		if self.callback_functions:
+			# Callbacks receive the state as a NumPy array and hence need the underlying Python object.
+			basics.append(("Y", "PyArrayObject *__restrict const"))
 		return basics
 	
+	def write_code_lines(self, lines, name, chunk_size=100, arguments=(), omp=True):
+		"""
+		Like `render_and_write_code`, but for code that is already formatted as lines of C. This skips building a symbolic wrapper node (like `set_dy(i,entry)`) around every expression only to have it printed right away.
+		"""
+		with \
+				open( self._tmpfile(name+".c"            ), "w" ) as mainfile, \
+				open( self._tmpfile(name+"_definitions.c"), "w" ) as deffile:
+			if chunk_size < 1:
+				for line in lines:
+					mainfile.write(line)
+			else:
+				write_in_chunks(lines,mainfile,deffile,name,chunk_size,arguments,omp)
+	
 	def _generate_f_C(self):
 		if not self._f_C_source:
 			self.generate_f_C()
@@ -191,8 +341,8 @@ class jitcode(jitcxde):
 		
 		Parameters
 		----------
-		simplify : boolean or None
-			Whether the derivative should be `simplified <http://docs.sympy.org/dev/modules/simplify/simplify.html>`_ (with `ratio=1.0`) before translating to C code. The main reason why you could want to enable this is if you expect your derivative not to be optimised and not be so large that simplifying takes a considerable amount of time. If `None`, this will be automatically disabled for `n>10`.
+		simplify : boolean, `"light"`, or `None`
+			Whether and how the derivative should be simplified before translating to C code: If `True`, SymEngine’s full `simplify` (with `ratio=1.0`) is applied, which can take a considerable amount of time for large derivatives. If `"light"`, the entries are merely expanded – which is cheap and lets obvious cancellations happen – and the heavy lifting is left to the compiler. If `False`, nothing happens. If `None`, this is automatically set to `"light"` for `n≤10` and `False` otherwise.
 		
 		do_cse : boolean
 			Whether SymPy’s `common-subexpression detection <http://docs.sympy.org/dev/modules/rewriting.html#module-sympy.simplify.cse_main>`_ should be applied before translating to C code. It is almost always better to let the compiler do this (unless you want to set the compiler optimisation to `-O2` or lower): For simple differential equations this should not make any difference to the compiler’s optimisations. For large ones, it may make a difference but also take long. As this requires all entries of `f` at once, it may void advantages gained from using generator functions as an input. Also, this feature uses SymPy and not SymEngine.
@@ -204,13 +354,15 @@ class jitcode(jitcxde):
 		
 		self._generate_helpers_C()
 		
-		# working copy
-		f_sym_wc = (entry.subs(self.general_subs) for entry in self.f_sym())
+		# working copy (no substitutions needed without helpers and control parameters)
+		if self.general_subs:
+			f_sym_wc = (entry.xreplace(self.general_subs) for entry in self.f_sym())
+		else:
+			f_sym_wc = self.f_sym()
 		
-		if simplify is None:
-			simplify = self.n<=10
+		simplify = _resolve_simplify(simplify,self.n)
 		if simplify:
-			f_sym_wc = (entry.simplify(ratio=1) for entry in f_sym_wc)
+			f_sym_wc = (_simplify_entry(entry,simplify) for entry in f_sym_wc)
 		
 		arguments = self._default_arguments()
 		
@@ -220,19 +372,19 @@ class jitcode(jitcxde):
 		if do_cse:
 			import sympy
 			get_helper = sympy.Function("get_f_helper")
-			set_helper = symengine.Function("set_f_helper")
 			
 			_cse = sympy.cse(
-					sympy.Matrix(sympy.sympify(list(f_sym_wc))),
-					symbols = (get_helper(i) for i in count())
+					[ sympy.sympify(entry) for entry in f_sym_wc ],
+					symbols = (get_helper(i) for i in count()),
+					order = "none",
 				)
 			more_helpers = symengine.sympify(_cse[0])
-			f_sym_wc = symengine.sympify(_cse[1][0])
+			f_sym_wc = symengine.sympify(_cse[1])
 			
 			if more_helpers:
 				arguments.append(("f_helper","double *__restrict const"))
-				self.render_and_write_code(
-					(set_helper(i,helper[1]) for i,helper in enumerate(more_helpers)),
+				self.write_code_lines(
+					( f"set_f_helper({i}, {_ccode(helper[1])});\n" for i,helper in enumerate(more_helpers) ),
 					name = "f_helpers",
 					chunk_size = chunk_size,
 					arguments = arguments,
@@ -240,12 +392,11 @@ class jitcode(jitcxde):
 					)
 				self._number_of_f_helpers = len(more_helpers)
 		
-		set_dy = symengine.Function("set_dy")
-		self.render_and_write_code(
-				(set_dy(i,entry) for i,entry in enumerate(f_sym_wc)),
+		self.write_code_lines(
+				( f"set_dy({i}, {_ccode(entry)});\n" for i,entry in enumerate(f_sym_wc) ),
 				name = "f",
 				chunk_size = chunk_size,
-				arguments = arguments+[("dY", "PyArrayObject *__restrict const")]
+				arguments = arguments+[("dY_data", "double *__restrict const")]
 			)
 		
 		self._f_C_source = True
@@ -275,8 +426,14 @@ class jitcode(jitcxde):
 		
 		self._generate_helpers_C()
 		
-		# working copy
-		jac_sym_wc = ( (entry.subs(self.general_subs) for entry in line) for line in self.jac_sym )
+		# working copy, flattened to the entries that are actually written (i.e., the nonzero ones if a sparse Jacobian is assumed)
+		general_subs = self.general_subs
+		jac_sym_wc = (
+				( i, j, entry.xreplace(general_subs) if general_subs else entry )
+				for i,line in enumerate(self.jac_sym)
+				for j,entry in enumerate(line)
+				if ( (entry != 0) or not sparse )
+			)
 		self.sparse_jac = sparse
 		
 		arguments = self._default_arguments()
@@ -286,23 +443,27 @@ class jitcode(jitcxde):
 		if do_cse:
 			import sympy
 			get_helper = sympy.Function("get_jac_helper")
-			set_helper = symengine.Function("set_jac_helper")
-			jac_sym_wc = sympy.Matrix([
-					[ sympy.sympify(entry) for entry in line ]
-					for line in jac_sym_wc
-				])
+			positions = []
+			expressions = []
+			for i,j,entry in jac_sym_wc:
+				positions.append((i,j))
+				expressions.append(sympy.sympify(entry))
 			
 			_cse = sympy.cse(
-					sympy.sympify(jac_sym_wc),
-					symbols = (get_helper(i) for i in count())
+					expressions,
+					symbols = (get_helper(i) for i in count()),
+					order = "none",
 				)
 			more_helpers = symengine.sympify(_cse[0])
-			jac_sym_wc = symengine.sympify(_cse[1][0].tolist())
+			jac_sym_wc = [
+					( i, j, entry )
+					for (i,j),entry in zip( positions, symengine.sympify(_cse[1]) )
+				]
 			
 			if more_helpers:
 				arguments.append(("jac_helper","double *__restrict const"))
-				self.render_and_write_code(
-						(set_helper(i, helper[1]) for i,helper in enumerate(more_helpers)),
+				self.write_code_lines(
+						( f"set_jac_helper({i}, {_ccode(helper[1])});\n" for i,helper in enumerate(more_helpers) ),
 						name = "jac_helpers",
 						chunk_size = chunk_size,
 						arguments = arguments,
@@ -310,18 +471,11 @@ class jitcode(jitcxde):
 					)
 				self._number_of_jac_helpers = len(more_helpers)
 		
-		set_dfdy = symengine.Function("set_dfdy")
-		
-		self.render_and_write_code(
-				(
-					set_dfdy(i,j,entry)
-					for i,line in enumerate(jac_sym_wc)
-					for j,entry in enumerate(line)
-					if ( (entry != 0) or not self.sparse_jac )
-				),
+		self.write_code_lines(
+				( f"set_dfdy({i}, {j}, {_ccode(entry)});\n" for i,j,entry in jac_sym_wc ),
 				name = "jac",
 				chunk_size = chunk_size,
-				arguments = arguments+[("dfdY", "PyArrayObject *__restrict const")]
+				arguments = arguments+[("dfdY_data", "double *__restrict const")]
 			)
 		
 		self._jac_C_source = True
@@ -347,12 +501,11 @@ class jitcode(jitcxde):
 		
 		if self.helpers:
 			get_helper = symengine.Function("get_general_helper")
-			set_helper = symengine.Function("set_general_helper")
 			
 			for i,helper in enumerate(self.helpers):
 				self.general_subs[helper[0]] = get_helper(i)
-			self.render_and_write_code(
-					(set_helper(i, helper[1].subs(self.general_subs)) for i,helper in enumerate(self.helpers)),
+			self.write_code_lines(
+					( f"set_general_helper({i}, {_ccode(helper[1].xreplace(self.general_subs))});\n" for i,helper in enumerate(self.helpers) ),
 					name = "general_helpers",
 					chunk_size = chunk_size,
 					arguments = self._default_arguments() + [("general_helper","double *__restrict const")],
@@ -366,12 +519,46 @@ class jitcode(jitcxde):
 			self.compile_C()
 			self.report("compiled C code")
 	
+	def system_hash(self):
+		"""
+		returns a hexadecimal hash over everything that determines the compiled functions, i.e., the derivative, the helpers, the control parameters, the callbacks, whether a Jacobian is wanted, and the code generation itself. Two instances of `jitcode` with the same hash can use each other’s compiled modules (see the `module_cache` argument of `compile_C`).
+		"""
+		hasher = sha256()
+		def feed(text):
+			hasher.update(text.encode("utf8"))
+			hasher.update(b"\0")
+		
+		# Salt the hash with the package version and the C template, lest a persistent cache serve modules compiled by an older version of the code generation:
+		try:
+			from jitcode.version import version
+		except ImportError:
+			version = "unknown"
+		feed(version)
+		with open( path.join(path.dirname(__file__),"jitced_template.c"), "rb" ) as template:
+			hasher.update(template.read())
+		hasher.update(b"\0")
+		
+		feed(str(self.n))
+		feed(str(bool(self._wants_jacobian)))
+		for entry in self.f_sym():
+			feed(str(entry))
+		for helper in self.helpers:
+			feed(str(helper[0]))
+			feed(str(helper[1]))
+		for control_par in self.control_pars:
+			feed(control_par.name)
+		for function,_,n_args in self.callback_functions:
+			feed(function.name)
+			feed(str(n_args))
+		return hasher.hexdigest()
+	
 	def compile_C(
 			self,
 			extra_compile_args=None, extra_link_args=None,
 			verbose = False,
 			modulename = None,
 			omp = False,
+			module_cache = False,
 		):
 		"""
 		compiles the C code (using `Setuptools <http://pythonhosted.org/setuptools/>`_) and loads the compiled functions. If no C code exists, it is generated by calling `generate_f_C` and `generate_jac_C`.
@@ -388,8 +575,26 @@ class jitcode(jitcxde):
 			The name used for the compiled module.
 		omp : pair of iterables of strings or boolean
 			What compiler arguments shall be used for multiprocessing (using OpenMP). If `True`, they will be selected automatically. If empty or `False`, no compilation for multiprocessing will happen (unless you supply the relevant compiler arguments otherwise).
+		module_cache : boolean or string specifying a path
+			Whether compiled modules shall be cached on disk, keyed by a hash of the symbolic system (see `system_hash`). If the module for an identical system has been compiled (and cached) before – be it by another instance, process, or script – it is loaded instead of generating and compiling any code, which skips the entire symbolic processing. If a string, it specifies the cache directory; if `True`, a directory in the user cache (respecting `XDG_CACHE_HOME`) is used. Cannot be combined with `modulename`.
 		"""
 		
+		if module_cache:
+			if modulename:
+				raise ValueError("The arguments modulename and module_cache cannot be combined, as caching requires the module name to be determined by the hash of the system.")
+			cache_dir = module_cache if isinstance(module_cache,str) else _default_module_cache_dir()
+			modulename = "jitced_" + self.system_hash()[:32]
+			cached_module = path.join( cache_dir, add_suffix(modulename) )
+			if path.isfile(cached_module):
+				self.jitced = module_from_path(cached_module)
+				self.compile_attempt = True
+				self.f = self.jitced.f
+				if hasattr(self.jitced,"jac"):
+					self.jac = self.jitced.jac
+				self._initialise = self.jitced.initialise
+				self.report("loaded compiled module from cache")
+				return
+		
 		self._generate_helpers_C()
 		self._generate_f_C()
 		self._generate_jac_C()
@@ -417,6 +622,17 @@ class jitcode(jitcxde):
 		if hasattr(self.jitced,"jac"):
 			self.jac = self.jitced.jac
 		self._initialise = self.jitced.initialise
+		
+		if module_cache:
+			makedirs(cache_dir,exist_ok=True)
+			shutil.copy(
+					get_module_path(self._modulename,self._tmpfile()),
+					cached_module
+				)
+			self.report("saved compiled module to cache")
+		
+		# The materialised derivative is no longer needed; release the memory.
+		self._f_sym_cache = None
 	
 	def _prepare_lambdas(self):
 		if self.callback_functions:
@@ -445,8 +661,8 @@ class jitcode(jitcxde):
 		
 		Parameters
 		----------
-		simplify : boolean
-			Whether the derivative should be `simplified <http://docs.sympy.org/dev/modules/simplify/simplify.html>`_ (with `ratio=1.0`) before translating to C code. The main reason why you could want to enable this is if you expect your derivative not to be optimised and not be so large that simplifying takes a considerable amount of time. If `None`, this will be automatically disabled for `n>10`.
+		simplify : boolean, `"light"`, or `None`
+			Whether and how the derivative should be simplified before lambdification; see `generate_f_C` for the possible values. If `None`, this is automatically set to `"light"` for `n≤10` and `False` otherwise.
 		
 		do_cse : boolean
 			Whether a common-subexpression detection, namely `LambdifyCSE`, should be used.
@@ -457,10 +673,9 @@ class jitcode(jitcxde):
 		# working copy
 		f_sym_wc = (ordered_subs(entry,self._lambda_subs) for entry in self.f_sym())
 		
-		if simplify is None:
-			simplify = self.n<=10
+		simplify = _resolve_simplify(simplify,self.n)
 		if simplify:
-			f_sym_wc = (entry.simplify(ratio=1.0) for entry in f_sym_wc)
+			f_sym_wc = (_simplify_entry(entry,simplify) for entry in f_sym_wc)
 		
 		lambdify = symengine.LambdifyCSE if do_cse else symengine.Lambdify
 		core_f = lambdify(self._lambda_args,list(f_sym_wc))
@@ -506,20 +721,148 @@ class jitcode(jitcxde):
 			self._generate_jac_lambda()
 		self.compile_attempt = False
 	
+	def _prepare_numba(self):
+		if self.callback_functions:
+			raise NotImplementedError("Callbacks do not work with Numba compilation. You must use the C backend.")
+		
+		if not hasattr(self,"_numba_subs"):
+			if self.helpers:
+				warn("Numba compilation handles helpers by plugging them in. This may be very inefficient", stacklevel=3)
+			
+			self._numba_subs = list(reversed(self.helpers))
+			self._numba_subs.extend( (y(i),symengine.Symbol("Y[%i]"%i)) for i in range(self.n) )
+			self._numba_subs.extend( (par,symengine.Symbol("p[%i]"%i)) for i,par in enumerate(self.control_pars) )
+	
+	def _compile_numba(self, name, assignments, shape):
+		"""
+		writes a Python function that fills an array as per `assignments` to an actual source file (Numba’s on-disk caching does not work without one), imports it, and returns it compiled with Numba.
+		"""
+		import numba
+		
+		lines = [
+				"import math",
+				"import numpy",
+				"",
+				f"def {name}(t,Y,p):",
+				f"\tresult = numpy.zeros({shape})",
+			]
+		lines.extend( "\t"+assignment for assignment in assignments )
+		lines.append("\treturn result")
+		
+		filename = self._tmpfile(name+"_numba.py")
+		with open(filename,"w") as codefile:
+			codefile.write("\n".join(lines)+"\n")
+		
+		spec = spec_from_file_location(name+"_numba",filename)
+		module = module_from_spec(spec)
+		spec.loader.exec_module(module)
+		
+		return numba.njit(cache=True,fastmath=True,error_model="numpy")(getattr(module,name))
+	
+	def generate_f_numba(self, simplify=None, do_cse=True):
+		"""
+		translates the symbolic derivative to a Python function and compiles it with `Numba <https://numba.pydata.org>`_ (requiring the latter to be installed). This is faster than the lambdified functions but slower than the compiled C code.
+		
+		Parameters
+		----------
+		simplify : boolean, `"light"`, or `None`
+			Whether and how the derivative should be simplified before compilation; see `generate_f_C` for the possible values. If `None`, this is automatically set to `"light"` for `n≤10` and `False` otherwise.
+		
+		do_cse : boolean
+			Whether SymPy’s common-subexpression detection should be applied before compilation.
+		"""
+		
+		import sympy
+		
+		self._prepare_numba()
+		
+		# working copy
+		f_sym_wc = (ordered_subs(entry,self._numba_subs) for entry in self.f_sym())
+		
+		simplify = _resolve_simplify(simplify,self.n)
+		if simplify:
+			f_sym_wc = (_simplify_entry(entry,simplify) for entry in f_sym_wc)
+		
+		expressions = [ sympy.sympify(entry) for entry in f_sym_wc ]
+		if do_cse:
+			intermediates,expressions = sympy.cse(expressions)
+		else:
+			intermediates = []
+		
+		assignments = [ f"{symbol} = {sympy.pycode(expression)}" for symbol,expression in intermediates ]
+		assignments.extend( f"result[{i}] = {sympy.pycode(expression)}" for i,expression in enumerate(expressions) )
+		
+		core_f = self._compile_numba("f",assignments,self.n)
+		self.f = lambda t,Y: core_f(t,np.asarray(Y,dtype=float),np.asarray(self.control_par_values,dtype=float))
+		
+		self.compile_attempt = False
+	
+	def generate_jac_numba(self, do_cse=True):
+		"""
+		translates the symbolic Jacobian to a Python function and compiles it with `Numba <https://numba.pydata.org>`_ (requiring the latter to be installed). If the symbolic Jacobian has not been generated, it is generated by calling `generate_jac_sym`.
+		
+		Parameters
+		----------
+		do_cse : boolean
+			Whether SymPy’s common-subexpression detection should be applied before compilation.
+		"""
+		
+		import sympy
+		
+		self._prepare_numba()
+		
+		entries = [
+				( i, j, sympy.sympify(ordered_subs(entry,self._numba_subs)) )
+				for i,line in enumerate(self.jac_sym)
+				for j,entry in enumerate(line)
+				if entry != 0
+			]
+		if do_cse:
+			intermediates,reduced = sympy.cse([ entry for _,_,entry in entries ])
+		else:
+			intermediates,reduced = [],[ entry for _,_,entry in entries ]
+		
+		assignments = [ f"{symbol} = {sympy.pycode(expression)}" for symbol,expression in intermediates ]
+		assignments.extend(
+				f"result[{i},{j}] = {sympy.pycode(expression)}"
+				for (i,j,_),expression in zip(entries,reduced)
+			)
+		
+		core_jac = self._compile_numba("jac",assignments,(self.n,self.n))
+		self.jac = lambda t,Y: core_jac(t,np.asarray(Y,dtype=float),np.asarray(self.control_par_values,dtype=float))
+		
+		self.compile_attempt = False
+	
+	def generate_numba(self):
+		"""
+		If they do not already exist, this generates Numba-compiled functions by calling `generate_f_numba` and, if wanted, `generate_jac_numba`.
+		"""
+		
+		if not _is_lambda(self.f):
+			self.generate_f_numba()
+			self.report("generated Numba-compiled f")
+		if self._wants_jacobian and not _is_lambda(self.jac):
+			self.generate_jac_numba()
+			self.report("generated Numba-compiled Jacobian")
+		self.compile_attempt = False
+	
 	@property
 	def _lacks_jacobian(self):
 		return self._wants_jacobian and self.jac is None
 	
 	def generate_functions(self):
 		"""
-		The central function-generating function. Tries to compile the derivative and, if wanted, the Jacobian. If this fails, it generates lambdified functions as a fallback.
+		The central function-generating function. Tries to compile the derivative and, if wanted, the Jacobian. If this fails, it generates Numba-compiled functions (if Numba is installed) or lambdified functions as a fallback.
 		"""
 		
 		if self.compile_attempt is None or self._lacks_jacobian:
 			self._attempt_compilation(reset=False)
 		
 		if not self.compile_attempt:
-			self.generate_lambdas()
+			try:
+				self.generate_numba()
+			except ImportError:
+				self.generate_lambdas()
 	
 	@property
 	def t(self):
@@ -578,12 +921,13 @@ class jitcode(jitcxde):
 			* `"LSODA"` – LSODA (implicit) via `solve_ivp`
 			* `"Radau"` – The implicit Radau method via `solve_ivp`
 			* `"vode"` – VODE (implicit) via `ode`
+			* `"rk4"` – classical Runge–Kutta with a fixed step size `dt` (which must be passed as an integrator parameter); this has no error control whatsoever, but also almost no overhead
 			
 			The `solve_ivp` methods are usually slightly faster for large differential equations, but they come with a massive overhead that makes them considerably slower for small differential equations. Implicit solvers are slower than explicit ones, except for stiff problems. If you don’t know what to choose, start with `"dopri5"`.
 		
 		nsteps: integer
  			Same as the respective parameter of the `ode` solvers, but with a higher default value to avoid annoying errors when getting rid of transients.
-		
+
 		interpolate: boolean
 			Whether the sampled solutions for `solve_ivp` solvers shall be obtained using interpolation. If your sampling step is small, this may make things faster; otherwise it depends. This may also make the results slightly less accurate.
 		
@@ -592,13 +936,13 @@ class jitcode(jitcxde):
 		"""
 		
 		info = integrator_info(name)
-		self._wants_jacobian |= info["wants_jac"]
+		self._wants_jacobian |= info.wants_jac
 		
 		old_integrator = self.integrator
 		
 		self.generate_functions()
 		
-		if info["backend"] == "ode":
+		if info.backend == "ode":
 			self.initialise()
 			self.integrator = ODE_wrapper(self.f,self.jac)
 			self.integrator.set_integrator(
@@ -606,7 +950,7 @@ class jitcode(jitcxde):
 					nsteps = nsteps,
 					**integrator_params
 				)
-		elif info["backend"] == "ivp":
+		elif info.backend == "ivp":
 			if not interpolate and name=="LSODA":
 				raise NotImplementedError("LSODA doesn’t work without interpolation.")
 			IVP = IVP_wrapper if interpolate else IVP_wrapper_no_interpolation
@@ -617,6 +961,12 @@ class jitcode(jitcxde):
 					jac = self.jac,
 					**integrator_params
 				)
+		elif info.backend == "rk4":
+			self.integrator = RK4_wrapper(
+					self.f,
+					initialiser = lambda: self.initialise(force=True),
+					**integrator_params
+				)
 		
 		# Restore state and time, if applicable:
 		try:
@@ -630,10 +980,13 @@ class jitcode(jitcxde):
 	def initialise(self,force=False):
 		if self._initialise is not None:
 			if len(self.control_par_values)==len(self.control_pars):
-				self._initialise(
-					*self.control_par_values,
-					*[callback for _,callback,_ in self.callback_functions]
-				)
+				# Skip the call into the compiled module if it already received these very values (common in parameter-sweep loops). As the parameters are global state of the module, which may be shared by several instances, the tracking lives on the module object:
+				if self.control_par_values != getattr(self.jitced,"_applied_parameters",None):
+					self._initialise(
+						*self.control_par_values,
+						*[callback for _,callback,_ in self.callback_functions]
+					)
+					self.jitced._applied_parameters = self.control_par_values
 			elif force:
 				raise RuntimeError("Something needs parameters to be set. Try calling `set_parameters` earlier.")
 	
@@ -656,6 +1009,29 @@ class jitcode(jitcxde):
 		
 		self.initialise()
 	
+	def clone_with_params(self,**values):
+		"""
+		returns a fresh instance of `jitcode` for the same differential equation, with the control parameters given by name pinned to the respective values (see `freeze_params`). This is intended for parameter scans in which each run works with fixed parameters and you want the compiler to treat them as constants. Combine this with the `module_cache` argument of `compile_C` to re-use compiled modules when revisiting parameter values.
+		"""
+		pars_by_name = { control_par.name: control_par for control_par in self.control_pars }
+		freeze_params = {}
+		for name,value in values.items():
+			try:
+				freeze_params[ pars_by_name[name] ] = value
+			except KeyError:
+				raise ValueError(f"There is no control parameter named {name}.") from None
+		
+		return jitcode(
+				list(self.f_sym()),
+				helpers = self.helpers,
+				wants_jacobian = self._wants_jacobian,
+				n = self.n,
+				control_pars = self.control_pars,
+				freeze_params = freeze_params,
+				callback_functions = self.callback_functions,
+				verbose = self.verbose,
+			)
+	
 	def set_f_params(self, *args):
 		warn("This function has been replaced by `set_parameters`")
 		self.set_parameters(*args)
@@ -679,41 +1055,68 @@ class jitcode_lyap(jitcode):
 	n_lyap : integer
 		Number of Lyapunov exponents to calculate. If negative or larger than the dimension of the system, all Lyapunov exponents are calculated.
 	
-	simplify : boolean
-		Whether the differential equations for the tangent vector shall be subjected to SymEngine’s `simplify`. Doing so may speed up the time evolution but may slow down the generation of the code (considerably for large differential equations). If `None`, this will be automatically disabled for `n>10`.
+	simplify : boolean, `"light"`, or `None`
+		Whether and how the differential equations for the tangent vector shall be simplified; see `generate_f_C` for the possible values. Simplifying may speed up the time evolution but may slow down the generation of the code (considerably for large differential equations with the full `simplify`). If `None`, this will be automatically set to `"light"` for `n≤10` and `False` otherwise.
+	
+	fast_restart : boolean
+		Whether the integrator shall be restarted with its previous step size after each renormalisation (only effective for `solve_ivp`-based integrators). Otherwise, the restarted integrator determines its initial step size anew every time, which costs a few extra evaluations of the derivative per call of `integrate`.
+	
+	interleaved : boolean
+		Whether the tangent vectors shall be stored interleaved in the state, i.e., with all tangent-vector values for a given component next to each other instead of one tangent vector after another. This way, the generated code for the tangent-vector dynamics accesses the state with unit stride across tangent vectors, which is friendlier to the compiler’s vectorisation and the caches when calculating several exponents. The results of `integrate` are not affected by this.
 	"""
 	
-	def __init__( self, f_sym=(), n_lyap=-1, simplify=None, **kwargs ):
+	def __init__( self, f_sym=(), n_lyap=-1, simplify=None, fast_restart=True, interleaved=False, **kwargs ):
 		self.n_basic = kwargs.pop("n",None)
+		self.fast_restart = fast_restart
+		self._interleaved = interleaved
 		
 		f_basic = self._handle_input(f_sym,n_basic=True)
 		self._n_lyap = n_lyap if (0<=n_lyap<=self.n_basic) else self.n_basic
 		if self._n_lyap>10:
 			warn("You are about to calculate %i Lyapunov exponents. This is very likely more than you need and may lead to severe difficulties with compilation and integration. Unless you really know what you are doing, consider how many Lyapunov exponents you actually need and set the parameter `n_lyap` accordingly." % self._n_lyap)
 		
-		if simplify is None:
-			simplify = self.n_basic<=10
+		simplify = _resolve_simplify(simplify,self.n_basic)
 		
 		helpers = sort_helpers(sympify_helpers( kwargs.pop("helpers",[]) ))
+		self._f_basic = f_basic
+		self._basic_helpers = helpers
 		
 		def f_lyap():
 			yield from f_basic()
 			
-			for i in range(self._n_lyap):
-				for line in _jac_from_f_with_helpers(
+			# Materialise the Jacobian once; all tangent vectors share it.
+			jac = [
+					list(line)
+					for line in _jac_from_f_with_helpers(
 						f = f_basic,
 						helpers = helpers,
 						simplify = False,
 						n = self.n_basic
-					):
-					expression = sum(
-							entry * y(k+(i+1)*self.n_basic)
-							for k,entry in enumerate(line)
-							if entry
-						)
-					if simplify:
-						expression = expression.simplify(ratio=1.0)
-					yield expression
+					)
+				]
+			
+			if self._interleaved:
+				for line in jac:
+					for i in range(self._n_lyap):
+						expression = sum(
+								entry * y(self.n_basic+k*self._n_lyap+i)
+								for k,entry in enumerate(line)
+								if entry
+							)
+						if simplify:
+							expression = _simplify_entry(expression,simplify)
+						yield expression
+			else:
+				for i in range(self._n_lyap):
+					for line in jac:
+						expression = sum(
+								entry * y(k+(i+1)*self.n_basic)
+								for k,entry in enumerate(line)
+								if entry
+							)
+						if simplify:
+							expression = _simplify_entry(expression,simplify)
+						yield expression
 		
 		super(jitcode_lyap, self).__init__(
 				f_lyap,
@@ -730,7 +1133,10 @@ class jitcode_lyap(jitcode):
 		for _ in range(self._n_lyap):
 			new_y.append(random_direction(self.n_basic))
 		
-		super(jitcode_lyap, self).set_initial_value(hstack(new_y), time)
+		state = hstack(new_y)
+		if self._interleaved:
+			state[self.n_basic:] = state[self.n_basic:].reshape(self._n_lyap,self.n_basic).T.flatten()
+		super(jitcode_lyap, self).set_initial_value(state, time)
 	
 	def set_integrator(self,name,interpolate=None,**kwargs):
 		"""
@@ -742,10 +1148,68 @@ class jitcode_lyap(jitcode):
 			warn("Using LSODA for Lyapunov exponents is discouraged since interpolation errors may accumulate.")
 		super(jitcode_lyap,self).set_integrator(name,interpolate,**kwargs)
 	
+	def generate_f_lambda(self, simplify=None, do_cse=False):
+		"""
+		Like `jitcode`’s `generate_f_lambda`, except that only the basic derivative and its Jacobian are lambdified and the tangent-vector dynamics are obtained from the latter with a single matrix product per evaluation (instead of lambdifying one expression per tangent-vector component).
+		"""
+		
+		if self.callback_functions:
+			raise NotImplementedError("Callbacks do not work with lambdification. You must use the C backend.")
+		if self._basic_helpers:
+			warn("Lambdification handles helpers by plugging them in. This may be very inefficient")
+		
+		n = self.n_basic
+		k = self._n_lyap
+		
+		lambda_subs = list(reversed(self._basic_helpers))
+		lambda_args = [t]
+		for i in range(n):
+			symbol = symengine.Symbol("dummy_argument_%i"%i)
+			lambda_args.append(symbol)
+			lambda_subs.append((y(i),symbol))
+		lambda_args.extend(self.control_pars)
+		
+		# working copy of the basic derivative
+		f_basic_wc = (ordered_subs(entry,lambda_subs) for entry in self._f_basic())
+		
+		simplify = _resolve_simplify(simplify,n)
+		if simplify:
+			f_basic_wc = (_simplify_entry(entry,simplify) for entry in f_basic_wc)
+		
+		jac_matrix = symengine.Matrix([
+				[ ordered_subs(entry,lambda_subs) for entry in line ]
+				for line in _jac_from_f_with_helpers(self._f_basic,self._basic_helpers,False,n)
+			])
+		
+		lambdify = symengine.LambdifyCSE if do_cse else symengine.Lambdify
+		core_f = lambdify(lambda_args,list(f_basic_wc))
+		core_jac = lambdify(lambda_args,jac_matrix)
+		
+		def f(time,Y):
+			arguments = np.hstack([time,Y[:n],self.control_par_values])
+			if self._interleaved:
+				tangents = np.asarray(Y[n:]).reshape(n,k).T
+				derivatives = (tangents @ core_jac(arguments).T).T
+			else:
+				tangents = np.asarray(Y[n:]).reshape(k,n)
+				derivatives = tangents @ core_jac(arguments).T
+			return np.hstack([ core_f(arguments), derivatives.ravel() ])
+		self.f = f
+		
+		self.compile_attempt = False
+	
 	def norms(self):
 		n = self.n_basic
-		tangent_vectors = self._y[n:].reshape(self._n_lyap,n)
-		tangent_vectors,norms = orthonormalise_qr(tangent_vectors)
+		# scratch copy of the stacked tangent vectors (Fortran order, so LAPACK can decompose in place)
+		if self._interleaved:
+			M = np.array( self._y[n:].reshape(n,self._n_lyap), order="F" )
+		else:
+			M = np.array( self._y[n:].reshape(self._n_lyap,n).T, order="F" )
+		Q,R = qr( M, mode="economic", overwrite_a=True, check_finite=False )
+		signs = np.sign(R.diagonal())
+		Q *= signs
+		norms = R.diagonal()*signs
+		tangent_vectors = Q.T
 		if not np.all(np.isfinite(norms)):
 			warn("Norms of perturbation vectors for Lyapunov exponents out of numerical bounds. You probably waited too long before renormalising and should call integrate with smaller intervals between steps (as renormalisations happen once with every call of integrate).")
 		return norms, tangent_vectors
@@ -771,7 +1235,15 @@ class jitcode_lyap(jitcode):
 		delta_t = self.t-old_t
 		norms, tangent_vectors = self.norms()
 		lyaps = log(norms) / delta_t
-		self._y[self.n_basic:] = tangent_vectors.flatten()
+		if self._interleaved:
+			self._y[self.n_basic:] = tangent_vectors.T.flatten()
+		else:
+			self._y[self.n_basic:] = tangent_vectors.flatten()
+		if self.fast_restart and isinstance(self.integrator,IVP_wrapper):
+			# Restart with the previous step size instead of determining a new one.
+			h_abs = getattr(self.integrator.backend,"h_abs",0)
+			if h_abs:
+				self.integrator.kwargs["first_step"] = h_abs
 		super(jitcode_lyap, self).set_initial_value(self._y, self.t)
 		
 		return self._y[:self.n_basic], lyaps, tangent_vectors
@@ -792,8 +1264,8 @@ class jitcode_transversal_lyap(jitcode,GroupHandler):
 	groups : iterable of iterables of integers
 		each group is an iterable of indices that identify dynamical variables that are synchronised on the synchronisation manifold.
 	
-	simplify : boolean
-		Whether the transformed differential equations shall be subjected to SymEngine’s `simplify`. Doing so may speed up the time evolution but may slow down the generation of the code (considerably for large differential equations). If `None`, this will be automatically disabled for `n>10`.
+	simplify : boolean, "light", or None
+		Whether the transformed differential equations shall be subjected to SymEngine’s `simplify` (if `True`) or only to a cheap expansion (if `"light"`). A full simplification may speed up the time evolution but may slow down the generation of the code (considerably for large differential equations). If `None` (default), light simplification is used for `n≤10` and none otherwise.
 	
 	average_dynamics : boolean
 		Whether the dynamics of synchronised variables shall be averaged over all variables in a synchronisation group. Otherwise, the dynamics of the first variable of a group is taken as representative (the default). Activating this option may be useful if the investigated synchrony is not complete – otherwise it has no effect. Using this voids the advantages of generator functions and may lead to problems with very large dynamics.
@@ -808,8 +1280,7 @@ class jitcode_transversal_lyap(jitcode,GroupHandler):
 		f_basic,extracted = self.extract_main(self._handle_input(f_sym))
 		helpers = sort_helpers(sympify_helpers( kwargs.pop("helpers",[]) ))
 		
-		if simplify is None:
-			simplify = self.n<=10
+		simplify = _resolve_simplify(simplify,self.n)
 		
 		z = symengine.Function("z")
 		z_vector = [z(i) for i in range(self.n)]
@@ -835,8 +1306,7 @@ class jitcode_transversal_lyap(jitcode,GroupHandler):
 		
 		def finalise(entry):
 			entry = entry.subs(substitutions)
-			if simplify:
-				entry = entry.simplify(ratio=1)
+			entry = _simplify_entry(entry,simplify)
 			return replace_function(entry,z,y)
 		
 		if average_dynamics:
@@ -935,12 +1405,17 @@ class jitcode_restricted_lyap(jitcode_lyap):
 		kwargs["n_lyap"] = 1
 		super(jitcode_restricted_lyap,self).__init__(f_sym,**kwargs)
 		self.vectors = [ vector/np.linalg.norm(vector) for vector in vectors ]
+		# orthonormalised, stacked copy of the basis, so the projection can be removed exactly with two matrix–vector products instead of a pair of vector products per basis vector – even if the given basis is not orthogonal
+		if self.vectors:
+			Q,_ = np.linalg.qr(np.vstack(self.vectors).T)
+			self._vector_matrix = Q.T
+		else:
+			self._vector_matrix = np.empty((0,self.n_basic))
 	
 	def norms(self):
 		n = self.n_basic
 		tangent_vector = self._y[n:2*n]
-		for vector in self.vectors:
-			tangent_vector -= np.dot(vector, tangent_vector)*vector
+		tangent_vector -= self._vector_matrix.T @ ( self._vector_matrix @ tangent_vector )
 		norm = np.linalg.norm(tangent_vector)
 		tangent_vector /= norm
 		if not np.isfinite(norm):
@@ -965,4 +1440,4 @@ def test(omp=True,sympy=True):
 	ODE.set_integrator("dopri5")
 	ODE.set_initial_value([1,2])
 	ODE.integrate(0.1)
-	
+
@@ -1,8 +1,9 @@
+from collections import namedtuple
+from functools import lru_cache
 from inspect import signature
 
 from scipy.integrate import ode
-from scipy.integrate._ode import find_integrator
-from scipy.integrate._ivp.ivp import METHODS as ivp_methods
+import numpy as np
 from numpy import inf
 
 class UnsuccessfulIntegration(Exception):
@@ -11,35 +12,58 @@ class UnsuccessfulIntegration(Exception):
 	"""
 	pass
 
+IntegratorInfo = namedtuple("IntegratorInfo",["backend","wants_jac","integrator"])
+
+@lru_cache(maxsize=None)
 def integrator_info(name):
 	"""
-	Finds out the integrator from a given name, what backend it uses, and whether it can use a Jacobian.
+	Finds out the integrator from a given name, what backend it uses, and whether it can use a Jacobian. As this inspects the integrator’s signature and possibly searches SciPy’s integrator registry, the result is cached per name.
 	"""
 	if name == 'zvode':
 		raise NotImplementedError("JiTCODE does not natively support complex numbers yet.")
 	
-	if name in ivp_methods.keys():
-		integrator = ivp_methods[name]
-		return {
-				"backend": "ivp",
-				"wants_jac": "jac" in signature(integrator).parameters,
-				"integrator": integrator
-			}
+	if name == "rk4":
+		return IntegratorInfo(
+				backend = "rk4",
+				wants_jac = False,
+				integrator = RK4_wrapper,
+			)
+	
+	# Imported here (and not at the top) to avoid loading SciPy's private integrator modules before they are needed; thanks to the memoisation, this happens at most once per name.
+	from scipy.integrate._ivp.ivp import METHODS as ivp_methods
+	
+	integrator = ivp_methods.get(name)
+	if integrator is not None:
+		return IntegratorInfo(
+				backend = "ivp",
+				wants_jac = "jac" in signature(integrator).parameters,
+				integrator = integrator,
+			)
 	else:
+		from scipy.integrate._ode import find_integrator
 		integrator = find_integrator(name)
 		if integrator is None:
 			raise RuntimeError("There is no integrator with that name; using fallback.")
-		return {
-				"backend": "ode",
-				"wants_jac": "with_jacobian" in signature(integrator).parameters,
-				"integrator": integrator
-			}
+		return IntegratorInfo(
+				backend = "ode",
+				wants_jac = "with_jacobian" in signature(integrator).parameters,
+				integrator = integrator,
+			)
+
+# Bit flags tracking which pieces of state the IVP wrapper still needs before it can instantiate the backend:
+_T0, _Y0 = 1, 2
+
+# Pre-constructed exceptions for interface methods that must not be called; this way, raising them does not even instantiate an exception:
+_not_called = AssertionError("This method should not be called")
+_not_called_anymore = NotImplementedError("This method should not be called anymore")
 
 class IVP_wrapper(object):
 	"""
 	This is a wrapper around the integrators from scipy.integrate.solve_ivp making them work like scipy.integrate.ode (mostly).
 	"""
 	
+	__slots__ = ("ivp_class","f","jac","wants_jac","initialiser","kwargs","backend","_ready","_t0","_y0")
+	
 	def __init__(
 			self,
 			name,
@@ -48,13 +72,13 @@ class IVP_wrapper(object):
 			**kwargs
 		):
 		info = integrator_info(name)
-		self.ivp_class = info["integrator"]
+		self.ivp_class = info.integrator
 		self.f = f
 		self.jac = jac
-		self.wants_jac = info["wants_jac"]
+		self.wants_jac = info.wants_jac
 		self.initialiser = initialiser
 		
-		# Dictionary to be passed as arguments to the integrator and store stuff
+		# Dictionary to be passed as arguments to the integrator; the current time and state are kept in plain attributes instead, as they are updated on every integrate call.
 		self.kwargs = {
 				"t_bound": inf,
 				"vectorized": False,
@@ -63,76 +87,222 @@ class IVP_wrapper(object):
 		if self.wants_jac:
 			self.kwargs["jac"] = self.jac
 		self.kwargs.update(kwargs)
+		
+		self._t0 = self.kwargs.pop("t0",None)
+		self._y0 = self.kwargs.pop("y0",None)
+		self._ready = 0
+		if self._t0 is not None:
+			self._ready |= _T0
+		if self._y0 is not None:
+			self._ready |= _Y0
 	
 	def set_integrator(self,*args,**kwargs):
-		raise AssertionError("This method should not be called")
+		raise _not_called
 	
 	@property
 	def _y(self):
-		return self.kwargs["y0"]
+		return self._y0
 	
 	@property
 	def t(self):
-		return self.kwargs["t0"]
+		return self._t0
 	
 	def try_to_initiate(self):
 		"""
 		initiate the integrator if all required arguments have been set
 		"""
-		if (
-				"t0" in self.kwargs and
-				"y0" in self.kwargs
-			):
+		if self._ready == _T0|_Y0:
 			self.initialiser()
-			self.backend = self.ivp_class(**self.kwargs)
+			self.backend = self.ivp_class(t0=self._t0,y0=self._y0,**self.kwargs)
 	
 	def set_initial_value(self, initial_value, time=0.0):
-		self.kwargs["t0"] = time
-		self.kwargs["y0"] = initial_value
+		# A private copy ensures that later modifications of the caller's array cannot alias the backend's initial state:
+		initial_value = np.array(initial_value,dtype=float)
+		self._t0 = time
+		self._y0 = initial_value
+		self._ready = _T0|_Y0
 		self.try_to_initiate()
 	
 	def set_params(self,*args):
-		raise NotImplementedError("This method should not be called anymore")
+		raise _not_called_anymore
 	
 	def integrate(self,t):
-		while self.backend.t < t or self.backend.t_old is None:
-			self.backend.step()
-			if self.backend.status == "failed":
+		if t == self._t0:
+			# Mirror ODE_wrapper's special case: the current state is requested again, e.g., because the output times include the initial time. Without this, an interpolant would be built just to evaluate it at a known point.
+			return self._y0.copy()
+		# Bind the backend and its step method to locals; this loop runs once per integrator step and attribute lookups add up.
+		backend = self.backend
+		step = backend.step
+		while backend.t < t or backend.t_old is None:
+			step()
+			if backend.status == "failed":
 				raise UnsuccessfulIntegration
-		self.kwargs["y0"] = self.backend.dense_output()(t)
-		self.kwargs["t0"] = t
-		return self.kwargs["y0"]
+		if backend.t == t:
+			# The integration landed exactly on the target time; no interpolation needed.
+			y = backend.y.copy()
+		else:
+			y = backend.dense_output()(t)
+		self._y0 = y
+		self._t0 = t
+		return y
+	
+	def integrate_batch(self,ts):
+		"""
+		integrates up to each time in `ts` (which must be sorted ascendingly) and returns the respective states as a two-dimensional array with one row per time. This is faster than calling `integrate` in a loop as the interpolating polynomial is only constructed once per integration step, no matter how many output times fall within that step.
+		"""
+		ts = np.asarray(ts)
+		if np.any(np.diff(ts)<0):
+			raise ValueError("Times must be sorted ascendingly.")
+		
+		output = np.empty(( len(ts), len(self._y0) ))
+		if not len(ts):
+			return output
+		
+		backend = self.backend
+		step = backend.step
+		dense_output = None
+		for i,t in enumerate(ts):
+			while backend.t < t or backend.t_old is None:
+				step()
+				if backend.status == "failed":
+					raise UnsuccessfulIntegration
+				dense_output = None
+			if backend.t == t:
+				output[i] = backend.y
+			else:
+				if dense_output is None:
+					dense_output = backend.dense_output()
+				output[i] = dense_output(t)
+		
+		self._y0 = output[-1].copy()
+		self._t0 = ts[-1]
+		return output
 	
 	def successful(self):
 		return self.backend.status != "failed"
 
 class IVP_wrapper_no_interpolation(IVP_wrapper):
+	__slots__ = ()
+	
 	def integrate(self,t):
-		if self.backend.t < t:
-			# Manually un-finish the integrator:
-			self.backend.t_bound = t
-			self.backend.status = "running"
+		backend = self.backend
+		if backend.t < t:
+			# Manually un-finish the integrator; if it is still running, moving the bound suffices:
+			backend.t_bound = t
+			if backend.status != "running":
+				backend.status = "running"
 			
-			while self.backend.status == "running":
-				self.backend.step()
+			step = backend.step
+			while backend.status == "running":
+				step()
 			
-			self.kwargs["y0"] = self.backend.y
-			self.kwargs["t0"] = t
-			if self.backend.status == "failed":
+			self._y0 = backend.y
+			self._t0 = t
+			if backend.status == "failed":
 				raise UnsuccessfulIntegration
 		
-		elif self.backend.t > t:
+		elif backend.t > t:
 			raise ValueError("Target time smaller than current time. Cannot integrate backwards in time")
 		
-		return self.kwargs["y0"]
+		return self._y0
+
+class EnsembleIVP_wrapper(IVP_wrapper):
+	"""
+	This wrapper integrates an ensemble of differential equations (e.g., instances of the same system with different frozen parameters, see `clone_with_params`) with a single SciPy integrator by stacking their states into one long state vector. This way, the per-step Python overhead is only paid once for the entire ensemble instead of once per instance. The flip side is that all instances share one step-size control, i.e., the instance requiring the smallest steps dictates the step size for all of them. Therefore only group instances of comparable stiffness. Jacobians are not used; methods that want one fall back to finite differences.
+	"""
+	
+	__slots__ = ("fs",)
+	
+	def __init__( self, name, fs, initialiser=lambda:None, **kwargs ):
+		self.fs = list(fs)
+		super().__init__( name, self._ensemble_f, initialiser=initialiser, **kwargs )
+	
+	def _ensemble_f(self,t,Y):
+		# This runs once per stage evaluation, so the attribute lookup is hoisted out of the loop.
+		fs = self.fs
+		states = Y.reshape(len(fs),-1)
+		out = np.empty_like(states)
+		for i,f in enumerate(fs):
+			out[i] = f(t,states[i])
+		return out.flatten()
+	
+	def set_initial_value(self, initial_value, time=0.0):
+		initial_value = np.asarray(initial_value)
+		if initial_value.ndim != 2 or initial_value.shape[0] != len(self.fs):
+			raise ValueError("Initial value must have one row per instance of the ensemble.")
+		super().set_initial_value( initial_value.flatten(), time )
+	
+	def integrate(self,t):
+		return super().integrate(t).reshape(len(self.fs),-1)
+
+class RK4_wrapper(object):
+	"""
+	A fixed-step classical Runge–Kutta integrator in the same interface as the other wrappers. There is no error or step-size control; you have to choose the step size `dt` carefully yourself. In exchange, the per-step overhead is far smaller than for SciPy's adaptive methods, which pays off for small, non-stiff differential equations. Between two output times, steps are equally sized and at most `dt` large, such that every output time is hit exactly.
+	"""
+	
+	__slots__ = ("f","dt","initialiser","_t","_y")
+	
+	def __init__( self, f, dt, initialiser=lambda:None ):
+		if dt <= 0:
+			raise ValueError("Step size must be positive.")
+		self.f = f
+		self.dt = dt
+		self.initialiser = initialiser
+		self._t = None
+		self._y = None
+	
+	@property
+	def t(self):
+		if self._t is None:
+			raise RuntimeError("You must call set_initial_value first.")
+		else:
+			return self._t
+	
+	def set_integrator(self,*args,**kwargs):
+		raise _not_called
+	
+	def set_initial_value(self, initial_value, time=0.0):
+		self.initialiser()
+		self._y = np.array(initial_value,dtype=float)
+		self._t = time
+	
+	def set_params(self,*args):
+		raise _not_called_anymore
+	
+	def integrate(self,t):
+		t0 = self.t
+		if t > t0:
+			f = self.f
+			y = self._y
+			number = int(np.ceil( (t-t0)/self.dt ))
+			h = (t-t0)/number
+			h2 = 0.5*h
+			for i in range(number):
+				time = t0 + i*h
+				k1 = f( time    , y         )
+				k2 = f( time+h2 , y+h2*k1   )
+				k3 = f( time+h2 , y+h2*k2   )
+				k4 = f( time+h  , y+h *k3   )
+				y = y + h/6*( k1 + 2*k2 + 2*k3 + k4 )
+			self._y = y
+			self._t = t
+		elif t < t0:
+			raise ValueError("Target time smaller than current time. Cannot integrate backwards in time")
+		return self._y
+	
+	def successful(self):
+		return True
 
 class ODE_wrapper(ode):
 	"""
 	This is a wrapper around Scipy’s ODE that mainly avoids confusing and pointless error messages and throws proper exceptions.
 	"""
+	# Bound once at class level to avoid the super() machinery on every call:
+	_ode_integrate = ode.integrate
+	
 	def integrate(self,t,step=False,relax=False):
 		if t>self.t or step or relax:
-			result = super(ODE_wrapper,self).integrate(t,step,relax)
+			result = self._ode_integrate(t,step,relax)
 			if self.successful():
 				return result
 			else:
@@ -147,13 +317,15 @@ class ODE_wrapper(ode):
 		return self.f_params
 	
 	def set_params(self,*args):
-		raise NotImplementedError("This method should not be called anymore")
+		raise _not_called_anymore
 
 class empty_integrator(object):
 	"""
 	This is a dummy class that mimicks some basic properties of scipy.integrate.ode or the above wrappers, respectively. It exists to store states and parameters and to raise exceptions in the same interface.
 	"""
-
+	
+	__slots__ = ("params","_y","_t")
+	
 	def __init__(self):
 		self.params = ()
 		self._y = []
@@ -174,11 +346,11 @@ class empty_integrator(object):
 		self._t = time
 	
 	def set_params(self,*args):
-		raise NotImplementedError("This method should not be called anymore")
+		raise _not_called_anymore
 	
 	def integrate(self,*args,**kwargs):
 		raise RuntimeError("You must call set_integrator first.")
 	
 	def successful(self):
 		raise RuntimeError("You must call set_integrator first.")
-	
+
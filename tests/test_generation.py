@@ -6,7 +6,9 @@ Tests that the code-generation and compilaton or lambdification, respectively, o
 """
 
 import unittest
+from importlib.util import find_spec
 
+import numpy as np
 from numpy.random import random
 from numpy.testing import assert_allclose
 
@@ -86,6 +88,21 @@ class FurtherHelpersTests(unittest.TestCase):
 				evaluate(with_helpers)
 			)
 	
+	def test_identity_of_parallel_jac(self):
+		x = random(n)
+		
+		def evaluate(processes):
+			ODE = jitcode(**with_helpers)
+			ODE.generate_jac_sym(processes=processes)
+			ODE.generate_jac_C()
+			ODE.compile_C()
+			return ODE.jac(0.0,x)
+		
+		assert_allclose(
+				evaluate(1),
+				evaluate(2)
+			)
+	
 	def test_identity_of_lyaps(self):
 		x = random((n+1)*n)
 		
@@ -98,6 +115,32 @@ class FurtherHelpersTests(unittest.TestCase):
 				evaluate(vanilla),
 				evaluate(with_helpers)
 			)
+	
+	def test_identity_of_interleaved_lyaps(self):
+		x = random((n+1)*n)
+		# Same state with the tangent vectors stored interleaved:
+		x_il = np.hstack([ x[:n], x[n:].reshape(n,n).T.flatten() ])
+		
+		ODE1 = jitcode_lyap(**vanilla,n_lyap=n)
+		ODE1.compile_C()
+		ODE2 = jitcode_lyap(**vanilla,n_lyap=n,interleaved=True)
+		ODE2.compile_C()
+		
+		result = ODE2.f(0.0,x_il)
+		assert_allclose(
+				np.hstack([ result[:n], result[n:].reshape(n,n).T.flatten() ]),
+				ODE1.f(0.0,x)
+			)
+	
+	def test_identity_of_lyap_lambdas(self):
+		x = random((n+1)*n)
+		
+		ODE1 = jitcode_lyap(**with_helpers,n_lyap=n)
+		ODE1.compile_C()
+		ODE2 = jitcode_lyap(**with_helpers,n_lyap=n)
+		ODE2.generate_f_lambda()
+		
+		assert_allclose( ODE1.f(0.0,x), ODE2.f(0.0,x) )
 
 class TestGenerator(TestBasic):
 	def setUp(self):
@@ -113,6 +156,36 @@ class TestParams(TestBasic):
 	def setUp(self):
 		self.ODE = jitcode(**with_params)
 
+class TestFreezeParams(unittest.TestCase):
+	def test_frozen_identity(self):
+		frozen = dict(zip( with_params["control_pars"], params_args ))
+		ODE = jitcode(**with_params,freeze_params=frozen)
+		self.assertEqual( len(ODE.control_pars), 0 )
+		ODE.generate_jac_C()
+		ODE.compile_C()
+		assert_allclose( ODE.f(0.0,y0), f_of_y0, rtol=1e-5 )
+		assert_allclose( ODE.jac(0.0,y0), jac_of_y0, rtol=1e-5 )
+	
+	def test_clone_with_params(self):
+		ODE1 = jitcode(**with_params)
+		names = [ par.name for par in with_params["control_pars"] ]
+		ODE2 = ODE1.clone_with_params(**dict(zip(names,params_args)))
+		ODE2.compile_C()
+		assert_allclose( ODE2.f(0.0,y0), f_of_y0, rtol=1e-5 )
+		with self.assertRaises(ValueError):
+			ODE1.clone_with_params(nonexistent_par=42)
+
+@unittest.skipUnless( find_spec("numba"), "Numba is not installed." )
+class TestNumba(unittest.TestCase):
+	def test_numba_with_jac(self):
+		ODE = jitcode(**with_params,wants_jacobian=True)
+		ODE.generate_numba()
+		self.assertTrue(_is_lambda(ODE.f))
+		self.assertTrue(_is_lambda(ODE.jac))
+		ODE.set_parameters(*params_args)
+		assert_allclose( ODE.f(0.0,y0), f_of_y0, rtol=1e-5 )
+		assert_allclose( ODE.jac(0.0,y0), jac_of_y0, rtol=1e-5 )
+
 class TestCallBack(unittest.TestCase):
 	def test_callback(self):
 		ODE = jitcode(**callback)
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+from tempfile import TemporaryDirectory
 
 import numpy as np
 from numpy.testing import assert_allclose
@@ -10,6 +11,7 @@ from symengine import symbols
 
 from jitcode import jitcode, y, jitcode_lyap, UnsuccessfulIntegration, test
 from jitcode._jitcode import _is_C, _is_lambda
+from jitcode.integrator_tools import EnsembleIVP_wrapper
 
 from scenarios import (
 		y0, f_of_y0, jac_of_y0, y1, lyaps, vanilla, n,
@@ -132,6 +134,74 @@ class TestIntegrators(unittest.TestCase):
 					ODE.set_initial_value(y0,0.0)
 					assert_allclose( ODE.integrate(1.0), y1, rtol=1e-3 )
 
+class TestRK4(unittest.TestCase):
+	def test_rk4(self):
+		ODE = jitcode(**vanilla)
+		ODE.set_integrator("rk4",dt=0.01)
+		ODE.set_initial_value(y0,0.0)
+		assert_allclose( ODE.integrate(1.0), y1, rtol=1e-4 )
+		with self.assertRaises(ValueError):
+			ODE.integrate(0.5)
+	
+	def test_bad_step_size(self):
+		ODE = jitcode(**vanilla)
+		with self.assertRaises(ValueError):
+			ODE.set_integrator("rk4",dt=0.0)
+
+class TestBatch(unittest.TestCase):
+	"""
+		Tests that batched integration gives the same results as calling `integrate` once per time.
+	"""
+	def test_integrate_batch(self):
+		times = np.linspace(0.01,1.0,100)
+		
+		ODE1 = jitcode(**vanilla)
+		ODE1.set_integrator("RK45")
+		ODE1.set_initial_value(y0,0.0)
+		data = ODE1.integrator.integrate_batch(times)
+		
+		ODE2 = jitcode(**vanilla)
+		ODE2.set_integrator("RK45")
+		ODE2.set_initial_value(y0,0.0)
+		expected = np.vstack([ ODE2.integrate(time) for time in times ])
+		
+		assert_allclose( data, expected, rtol=1e-4, atol=1e-10 )
+		# Batched and plain integration continue from the same state:
+		assert_allclose( ODE1.integrate(2.0), ODE2.integrate(2.0), rtol=1e-4 )
+	
+	def test_unsorted_times(self):
+		ODE = jitcode(**vanilla)
+		ODE.set_integrator("RK45")
+		ODE.set_initial_value(y0,0.0)
+		with self.assertRaises(ValueError):
+			ODE.integrator.integrate_batch([1.0,0.5])
+
+class TestEnsemble(unittest.TestCase):
+	"""
+		Tests that integrating an ensemble in one go gives the same results as integrating its instances individually.
+	"""
+	def test_ensemble(self):
+		initial_values = np.vstack([ y0, np.roll(y0,2) ])
+		ODEs = [ jitcode(**vanilla) for _ in initial_values ]
+		for ODE in ODEs:
+			ODE.compile_C()
+		
+		ensemble = EnsembleIVP_wrapper( "RK45", [ODE.f for ODE in ODEs], rtol=1e-8, atol=1e-8 )
+		ensemble.set_initial_value(initial_values,0.0)
+		result = ensemble.integrate(1.0)
+		
+		for ODE,initial_value,row in zip(ODEs,initial_values,result):
+			ODE.set_integrator("RK45",rtol=1e-8,atol=1e-8)
+			ODE.set_initial_value(initial_value,0.0)
+			assert_allclose( row, ODE.integrate(1.0), rtol=1e-4, atol=1e-8 )
+	
+	def test_bad_initial_shape(self):
+		ODE = jitcode(**vanilla)
+		ODE.compile_C()
+		ensemble = EnsembleIVP_wrapper( "RK45", [ODE.f] )
+		with self.assertRaises(ValueError):
+			ensemble.set_initial_value(y0,0.0)
+
 class TestLyapunov(unittest.TestCase):
 	"""
 		Integration test for jitcode_lyap.
@@ -164,6 +234,22 @@ class TestLyapunov(unittest.TestCase):
 		for i in range(n):
 			self.assertLess( result[i]-lyaps[i], 5*margin[i] )
 
+class TestModuleCache(unittest.TestCase):
+	def test_cache_hit(self):
+		with TemporaryDirectory() as cache_dir:
+			ODE1 = jitcode(**vanilla)
+			ODE1.compile_C(module_cache=cache_dir)
+			ODE2 = jitcode(**vanilla)
+			ODE2.compile_C(module_cache=cache_dir)
+			self.assertEqual( ODE1.system_hash(), ODE2.system_hash() )
+			self.assertTrue(_is_C(ODE2.f))
+			assert_allclose( ODE2.f(0.0,y0), f_of_y0, rtol=1e-5 )
+	
+	def test_modulename_conflict(self):
+		ODE = jitcode(**vanilla)
+		with self.assertRaises(ValueError):
+			ODE.compile_C(modulename="conflicting_name",module_cache=True)
+
 class TestErrors(unittest.TestCase):
 	def test_duplicate_error(self):
 		ODE1 = jitcode(**vanilla)